@@ -11,13 +11,17 @@ from components.deleteModal import DeleteModal
 from components.editModal import EditModal
 from components.searchModal import SearchModal
 from components.stickyNote import StickyNote
+from components.jumpModal import JumpModal
+from components.duplicatesModal import DuplicatesModal
 from models import Note
+from navigation import GridNavigator
 
 
 class StickyNotesApp(App):
     column_count = 3;
     storage: NoteStorage = None
     default_note:Note = Note("New title",content="New")
+    grid: GridNavigator = None
 
     BINDINGS = [("d", "toggle_dark_mode", "toggle dark mode"),
                 ("ctrl+c", "quit", "Force Quit"),
@@ -29,11 +33,17 @@ class StickyNotesApp(App):
                 ("k", "move_up", "Move Up"),
                 ("down", "move_down", "Move Down"),
                 ("j", "move_down", "Move Down"),
+                ("pageup", "page_up", "Page Up"),
+                ("pagedown", "page_down", "Page Down"),
+                ("home", "move_home", "First note"),
+                ("end", "move_end", "Last note"),
+                ("g", "jump_to_note", "Jump to note"),
                 ("a","add_note","add a new note"),
                 ("r","delete_note","delete a note"),
                 ("e","edit_note","edit a note"),
                 ("1-9"," ","border color"),
                 ("s","search_notes","search notes"),
+                ("u","show_duplicates","similar notes"),
                 ("o", "sort_notes", "Sort notes"),
                 ("ctrl+s", "save_notes", "Save notes"), 
                 ("ctrl+l", "load_notes", "Load notes"),  
@@ -55,14 +65,99 @@ class StickyNotesApp(App):
             if isinstance(focused_widget, StickyNote):
                 focused_widget.color = self.COLORS[event.key]
 
+    def sync_grid(self) -> list:
+        """Point the grid navigator at the focused note and return the notes in grid order"""
+        notes = self.query_one("#notes").children
+        self.grid.resize(self.column_count)
+        self.grid.count = len(notes)
+        focused_widget = self.screen.focused
+        if isinstance(focused_widget, StickyNote):
+            index = self.grid.clamp(self.grid.index)
+            if index >= len(notes) or notes[index] is not focused_widget:
+                index = notes.index(focused_widget)
+            self.grid.sync(index, len(notes))
+        else:
+            self.grid.sync(self.grid.index, len(notes))
+        return notes
+
+    def focus_note_at(self, index: int, notes: list = None):
+        if notes is None:
+            notes = self.query_one("#notes").children
+        if not notes:
+            return
+        self.grid.sync(index, len(notes))
+        sticky_note = notes[self.grid.index]
+        sticky_note.focus()
+        sticky_note.scroll_visible()
+
+    def rows_per_page(self, notes: list) -> int:
+        """Note rows that fit between the header and footer, as laid out now"""
+        if not notes:
+            return 1
+        if len(notes) > self.grid.columns:
+            # Distance from one row to the next, gutter included
+            row_height = notes[self.grid.columns].region.y - notes[0].region.y
+        else:
+            row_height = notes[0].outer_size.height
+        visible_height = (self.screen.size.height - self.query_one(Header).outer_size.height
+                          - self.query_one(Footer).outer_size.height)
+        return max(1, visible_height // max(1, row_height))
+
+    def focus_grid_note(self, notes: list) -> bool:
+        """Focus the note at the grid position when no note has focus; True if it did"""
+        if not notes or isinstance(self.screen.focused, StickyNote):
+            return False
+        self.focus_note_at(self.grid.index, notes)
+        return True
+
     def action_move_up(self):
-        for _ in range(self.column_count):
-            self.action_focus_previous()
+        notes = self.sync_grid()
+        if not self.focus_grid_note(notes):
+            self.focus_note_at(self.grid.up(), notes)
+
     def action_move_down(self):
-        for _ in range(self.column_count):
-            self.action_focus_next()
+        notes = self.sync_grid()
+        if not self.focus_grid_note(notes):
+            self.focus_note_at(self.grid.down(), notes)
+
+    def action_page_up(self):
+        notes = self.sync_grid()
+        if not self.focus_grid_note(notes):
+            self.focus_note_at(self.grid.page_up(self.rows_per_page(notes)), notes)
+
+    def action_page_down(self):
+        notes = self.sync_grid()
+        if not self.focus_grid_note(notes):
+            self.focus_note_at(self.grid.page_down(self.rows_per_page(notes)), notes)
+
+    def action_move_home(self):
+        notes = self.sync_grid()
+        self.focus_note_at(self.grid.home(), notes)
+
+    def action_move_end(self):
+        notes = self.sync_grid()
+        self.focus_note_at(self.grid.end(), notes)
+
+    @work
+    async def action_jump_to_note(self):
+        notes = self.sync_grid()
+        if not notes:
+            self.notify("No notes to jump to!", severity="warning")
+            return
+
+        number = await self.push_screen_wait(JumpModal(len(notes)))
+        if number is None:
+            return
+
+        notes = self.sync_grid()
+        index = self.grid.jump(number)
+        if index is None:
+            self.notify(f"No note number {number}", severity="error")
+            return
+        self.focus_note_at(index, notes)
 
     def on_mount(self) -> None:
+        self.grid = GridNavigator(self.column_count)
         self.storage = NoteStorage()
         self.load_saved_notes()
 
@@ -104,6 +199,8 @@ class StickyNotesApp(App):
         
         for i, note in enumerate(sorted_notes):
             container.move_child(note, after=len(container.children) - 1)
+        # The focused note has moved; re-anchor the grid position to it
+        self.sync_grid()
         self.action_save_notes()
 
     @work
@@ -155,6 +252,44 @@ class StickyNotesApp(App):
             
             self.notify("Could not find the note", severity="error")
 
+    def action_show_duplicates(self):
+        """Show groups of near-duplicate notes"""
+        notes_by_id = {sn.note.note_id: sn.note for sn in self.query(StickyNote)}
+        if not notes_by_id:
+            self.notify("No notes to compare!", severity="warning")
+            return
+        self.find_duplicates(notes_by_id)
+
+    @work(thread=True, exclusive=True, group="duplicates")
+    def find_duplicates(self, notes_by_id: dict):
+        """Group similar notes off the UI thread; building a large index takes a while"""
+        groups = self.storage.duplicate_groups()
+        self.call_from_thread(self.show_duplicates, groups, notes_by_id)
+
+    def show_duplicates(self, groups: list | None, notes_by_id: dict):
+        if groups is None:
+            self.notify("Could not read the similar notes index", severity="error")
+            return
+
+        # Only notes we are showing are listed
+        note_groups = [[notes_by_id[note_id] for note_id in group if note_id in notes_by_id]
+                       for group in groups]
+        note_groups = [group for group in note_groups if len(group) > 1]
+        if not note_groups:
+            self.notify("No similar notes found!", severity="information")
+            return
+
+        self.push_screen(DuplicatesModal(note_groups), self.focus_selected_note)
+
+    def focus_selected_note(self, selected_note: Note | None):
+        if selected_note is None:
+            return
+        for sticky_note in self.query(StickyNote):
+            if sticky_note.note.note_id == selected_note.note_id:
+                sticky_note.focus()
+                sticky_note.scroll_visible()
+                return
+
     def load_saved_notes(self):
         notes_with_colors = self.storage.load_notes()
         
@@ -193,5 +328,7 @@ class StickyNotesApp(App):
         notes_container = self.query_one("#notes")
         self.column_count = max(1,event.size.width//40)
         notes_container.styles.grid_size_columns = self.column_count
+        if self.grid is not None:
+            self.grid.resize(self.column_count)
         return super()._on_resize(event)
 
@@ -7,51 +7,31 @@ Usage:
     python cli.py add --title "Session Summary" --content "..." --session-note
     python cli.py list
     python cli.py search "keyword"
+    python cli.py dedupe [--threshold 0.6] [--merge]
+    python cli.py add-batch < notes.jsonl
+    python cli.py daemon start|stop|status
+
+When the notes daemon is running, commands are sent to it over a Unix socket;
+otherwise they read and write notes.json directly.
 """
 
 import argparse
 import json
 import os
 import sys
+import time
 import uuid
 from datetime import datetime
-from pathlib import Path
-
-
-def get_storage_path():
-    """Get the notes.json path based on platform."""
-    if os.name == 'nt':  # Windows
-        app_data = os.environ.get('APPDATA', os.path.join(os.path.expanduser('~'), 'AppData', 'Roaming'))
-        return Path(app_data) / 'StickyNotes' / 'notes.json'
-    elif sys.platform == 'darwin':  # macOS
-        return Path.home() / 'Library' / 'Application Support' / 'StickyNotes' / 'notes.json'
-    else:  # Linux
-        xdg_data = os.environ.get('XDG_DATA_HOME', Path.home() / '.local' / 'share')
-        return Path(xdg_data) / 'sticky-notes' / 'notes.json'
-
-
-def load_notes(filepath: Path) -> list:
-    """Load notes from JSON file."""
-    if not filepath.exists():
-        return []
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return json.load(f)
 
+from daemon import DaemonError, connect, get_socket_path, open_notes, start_background
+from dedupe import DEFAULT_THRESHOLD, MIN_THRESHOLD
+from notestore import get_note_tags, get_note_title
 
-def save_notes(filepath: Path, notes: list):
-    """Save notes to JSON file."""
-    filepath.parent.mkdir(parents=True, exist_ok=True)
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(notes, f, indent=2, ensure_ascii=False)
-
-
-def add_note(title: str, content: str, tags: str = '', color: str = 'yellow',
-             priority: int = 0, pinned: bool = False, session_id: str = None,
-             session_context: dict = None):
-    """Add a new note to the sticky notes system."""
-    filepath = get_storage_path()
-    notes = load_notes(filepath)
 
+def build_note(title: str, content: str, tags: str = '', color: str = 'yellow',
+               priority: int = 0, pinned: bool = False, session_id: str = None,
+               session_context: dict = None) -> dict:
+    """Build a new note dict in the notes.json format."""
     now = datetime.now().isoformat()
 
     note = {
@@ -72,31 +52,77 @@ def add_note(title: str, content: str, tags: str = '', color: str = 'yellow',
         note['session_id'] = session_id
     if session_context:
         note['session_context'] = session_context
+    return note
+
+
+def print_duplicate_warnings(duplicates: list):
+    for match in duplicates:
+        print(f"Warning: likely duplicate of '{match['title']}' ({match['note_id']}, "
+              f"{match['score']:.0%} similar)", file=sys.stderr)
 
-    notes.append(note)
-    save_notes(filepath, notes)
+
+def add_note(title: str, content: str, tags: str = '', color: str = 'yellow',
+             priority: int = 0, pinned: bool = False, session_id: str = None,
+             session_context: dict = None, check_duplicates: bool = True):
+    """Add a new note to the sticky notes system."""
+    note = build_note(title, content, tags, color, priority, pinned, session_id, session_context)
+
+    notes = open_notes()
+    try:
+        result = notes.call('add', note=note, check_duplicates=check_duplicates)
+    finally:
+        notes.close()
+    print_duplicate_warnings(result['duplicates'])
 
     print(f"Added note: {title}")
     print(f"Note ID: {note['note_id']}")
     return note
 
 
+def add_notes_batch(stream, check_duplicates: bool = True):
+    """Add one note per JSON line of `stream` in a single batch (one write to notes.json)."""
+    fields = ('title', 'content', 'tags', 'color', 'priority', 'pinned', 'session_id', 'session_context')
+    new_notes = []
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        data = json.loads(line)
+        if 'title' not in data or 'content' not in data:
+            raise ValueError(f"line {line_number}: 'title' and 'content' are required")
+        new_notes.append(build_note(**{k: v for k, v in data.items() if k in fields}))
+
+    notes = open_notes()
+    try:
+        results = notes.batch([('add', {'note': note, 'check_duplicates': check_duplicates})
+                               for note in new_notes])
+    finally:
+        notes.close()
+
+    added = 0
+    for note, result in zip(new_notes, results):
+        if not result['ok']:
+            print(f"Failed to add '{note['noteTitle']}': {result['error']}", file=sys.stderr)
+            continue
+        print_duplicate_warnings(result['result']['duplicates'])
+        print(f"Added note: {note['noteTitle']} ({note['note_id']})")
+        added += 1
+    print(f"Added {added} of {len(new_notes)} notes")
+
+
 def list_notes(limit: int = 10):
     """List recent notes."""
-    filepath = get_storage_path()
-    notes = load_notes(filepath)
-
-    # Sort by updated_at descending
-    notes.sort(key=lambda n: n.get('updated_at', ''), reverse=True)
+    notes = open_notes()
+    try:
+        result = notes.call('list', limit=limit)
+    finally:
+        notes.close()
 
-    print(f"Found {len(notes)} notes (showing last {limit}):\n")
+    print(f"Found {result['total']} notes (showing last {limit}):\n")
 
-    for i, note in enumerate(notes[:limit]):
-        title = note.get('noteTitle', note.get('title', 'Untitled'))
+    for i, note in enumerate(result['notes']):
+        title = get_note_title(note)
         color = note.get('color', 'white')
-        tags = note.get('tags', '')
-        if isinstance(tags, list):
-            tags = ','.join(tags)
+        tags = get_note_tags(note)
 
         print(f"[{i+1}] {title}")
         print(f"    Color: {color} | Tags: {tags or '(none)'}")
@@ -106,31 +132,102 @@ def list_notes(limit: int = 10):
 
 def search_notes(keyword: str):
     """Search notes by keyword."""
-    filepath = get_storage_path()
-    notes = load_notes(filepath)
-
-    keyword_lower = keyword.lower()
-    matches = []
-
-    for note in notes:
-        title = note.get('noteTitle', note.get('title', ''))
-        content = note.get('content', '')
-        tags = note.get('tags', '')
-        if isinstance(tags, list):
-            tags = ','.join(tags)
-
-        if keyword_lower in title.lower() or keyword_lower in content.lower() or keyword_lower in tags.lower():
-            matches.append(note)
+    notes = open_notes()
+    try:
+        matches = notes.call('search', keyword=keyword)
+    finally:
+        notes.close()
 
     print(f"Found {len(matches)} notes matching '{keyword}':\n")
 
     for note in matches:
-        title = note.get('noteTitle', note.get('title', 'Untitled'))
+        title = get_note_title(note)
         print(f"- {title}")
         print(f"  {note.get('content', '')[:100]}...")
         print()
 
 
+def dedupe_notes(threshold: float = DEFAULT_THRESHOLD, merge: bool = False, limit: int = 20):
+    """Report groups of near-duplicate notes, optionally merging each group into one note."""
+    notes = open_notes()
+    try:
+        result = notes.call('dedupe', threshold=threshold, merge=merge)
+    finally:
+        notes.close()
+    groups = result['groups']
+    merges = result['merges']
+    removed_count = sum(len(m['removed']) for m in merges)
+
+    duplicate_count = sum(len(group) - 1 for group in groups)
+    note_count = result['total'] + removed_count
+    print(f"Found {len(groups)} groups of similar notes ({duplicate_count} duplicates) "
+          f"among {note_count} notes:\n")
+
+    for i, group in enumerate(groups[:limit]):
+        print(f"[{i+1}] {len(group)} similar notes")
+        for note in group:
+            print(f"    - {get_note_title(note)} ({note['note_id']}) {note.get('updated_at', '')}")
+        print()
+    if len(groups) > limit:
+        print(f"... and {len(groups) - limit} more groups\n")
+
+    if merges:
+        titles = {note['note_id']: get_note_title(note) for group in groups for note in group}
+        for m in merges:
+            print(f"Kept '{titles[m['kept']]}' ({m['kept']}), removed:")
+            for note_id in m['removed']:
+                appended = " (content appended to the kept note)" if note_id in m['appended'] else ""
+                print(f"    - '{titles[note_id]}' ({note_id}){appended}")
+        print(f"\nMerged {len(merges)} groups, removed {removed_count} duplicate notes.")
+        print("Their tags were merged into the kept notes. Content of notes not similar to the kept one "
+              "was appended to it; the rest is in the notes.json backup in backups/.")
+
+
+def similarity_threshold(value: str) -> float:
+    """argparse type for --threshold: the range the LSH bands can find pairs in."""
+    threshold = float(value)
+    if not MIN_THRESHOLD <= threshold <= 1:
+        raise argparse.ArgumentTypeError(f"must be between {MIN_THRESHOLD} and 1, got {value}")
+    return threshold
+
+
+def daemon_command(action: str):
+    """Start, stop or check the background notes daemon."""
+    client = connect()
+
+    if action == 'status':
+        if client is None:
+            print("Notes daemon is not running")
+            return
+        status = client.call('ping')
+        client.close()
+        print(f"Notes daemon running (pid {status['pid']}, {status['notes']} notes)")
+
+    elif action == 'start':
+        if client is not None:
+            client.close()
+            print("Notes daemon is already running")
+            return
+        if start_background():
+            print("Notes daemon started")
+        else:
+            print("Notes daemon did not start", file=sys.stderr)
+            sys.exit(1)
+
+    elif action == 'stop':
+        if client is None:
+            print("Notes daemon is not running")
+            return
+        client.call('shutdown')
+        client.close()
+        # The daemon removes its socket once it has saved and exited
+        socket_path = get_socket_path()
+        deadline = time.monotonic() + 10
+        while socket_path.exists() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        print("Notes daemon stopped")
+
+
 def main():
     parser = argparse.ArgumentParser(description='Sticky Notes CLI')
     subparsers = parser.add_subparsers(dest='command', help='Commands')
@@ -149,6 +246,15 @@ def main():
     add_parser.add_argument('--session-id', help='Session ID for context')
     add_parser.add_argument('--machine', default=os.environ.get('COMPUTERNAME', 'unknown'), help='Machine name')
     add_parser.add_argument('--project', default='unknown', help='Project name')
+    add_parser.add_argument('--no-dedupe-check', action='store_true',
+                          help='Skip the likely-duplicate warning')
+
+    # Batch add command
+    batch_parser = subparsers.add_parser('add-batch', help='Add notes from JSON lines in one batch')
+    batch_parser.add_argument('file', nargs='?', type=argparse.FileType('r', encoding='utf-8'),
+                            default=sys.stdin, help='JSON lines file (default: stdin)')
+    batch_parser.add_argument('--no-dedupe-check', action='store_true',
+                            help='Skip the likely-duplicate warnings')
 
     # List command
     list_parser = subparsers.add_parser('list', help='List recent notes')
@@ -158,6 +264,18 @@ def main():
     search_parser = subparsers.add_parser('search', help='Search notes')
     search_parser.add_argument('keyword', help='Search keyword')
 
+    # Dedupe command
+    dedupe_parser = subparsers.add_parser('dedupe', help='Report or merge near-duplicate notes')
+    dedupe_parser.add_argument('--threshold', type=similarity_threshold, default=DEFAULT_THRESHOLD,
+                             help=f'Minimum similarity ({MIN_THRESHOLD}-1) to count as a duplicate')
+    dedupe_parser.add_argument('--merge', action='store_true',
+                             help='Keep the newest note of each group and delete the rest')
+    dedupe_parser.add_argument('--limit', '-n', type=int, default=20, help='Number of groups to show')
+
+    # Daemon command
+    daemon_parser = subparsers.add_parser('daemon', help='Manage the background notes daemon')
+    daemon_parser.add_argument('action', choices=['start', 'stop', 'status'])
+
     args = parser.parse_args()
 
     if args.command == 'add':
@@ -180,18 +298,32 @@ def main():
             priority=args.priority,
             pinned=args.pinned,
             session_id=args.session_id,
-            session_context=session_context
+            session_context=session_context,
+            check_duplicates=not args.no_dedupe_check
         )
 
+    elif args.command == 'add-batch':
+        add_notes_batch(args.file, check_duplicates=not args.no_dedupe_check)
+
     elif args.command == 'list':
         list_notes(args.limit)
 
     elif args.command == 'search':
         search_notes(args.keyword)
 
+    elif args.command == 'dedupe':
+        dedupe_notes(args.threshold, args.merge, args.limit)
+
+    elif args.command == 'daemon':
+        daemon_command(args.action)
+
     else:
         parser.print_help()
 
 
 if __name__ == '__main__':
-    main()
+    try:
+        main()
+    except (DaemonError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,47 @@
+from textual.screen import ModalScreen
+from textual.widgets import Button, ListView, ListItem, Label
+from textual.containers import Vertical, Horizontal
+from models import Note
+
+class DuplicatesModal(ModalScreen[Note]):
+    """List groups of near-duplicate notes"""
+
+    BINDINGS = [("escape", "dismiss", "Close")]
+
+    def __init__(self, groups: list, **kwargs):
+        self.groups = groups
+        # Note shown at each ListView row, None for group headers
+        self.row_notes = []
+        super().__init__(**kwargs)
+
+    def compose(self):
+        with Vertical(id="duplicatesContainer"):
+            yield Label(f"🧬 Similar Notes ({len(self.groups)} groups)", id="duplicatesTitle")
+            yield ListView(id="duplicatesResults")
+            with Horizontal(id="duplicatesButtons"):
+                yield Button("Close", variant="primary", id="close")
+
+    def on_mount(self) -> None:
+        results_view = self.query_one("#duplicatesResults", ListView)
+        for i, group in enumerate(self.groups):
+            results_view.append(ListItem(Label(f"[{i + 1}] {len(group)} similar notes")))
+            self.row_notes.append(None)
+            for note in group:
+                preview = note.content[:50] + "..." if len(note.content) > 50 else note.content
+                results_view.append(ListItem(Label(f"   📝 {note.noteTitle}\n      {preview}")))
+                self.row_notes.append(note)
+        results_view.focus()
+
+    def on_list_view_selected(self, event: ListView.Selected) -> None:
+        """Jump to the selected note"""
+        index = event.list_view.index
+        if index is not None and 0 <= index < len(self.row_notes):
+            if self.row_notes[index] is not None:
+                self.dismiss(self.row_notes[index])
+
+    def on_button_pressed(self, event: Button.Pressed) -> None:
+        if event.button.id == "close":
+            self.dismiss(None)
+
+    def action_dismiss(self):
+        self.dismiss()
@@ -0,0 +1,29 @@
+from textual.screen import ModalScreen
+from textual.widgets import Input, Label
+from textual.containers import Vertical
+
+class JumpModal(ModalScreen[int]):
+    """Ask for a note number to jump to"""
+
+    BINDINGS = [("escape", "dismiss", "Close")]
+
+    def __init__(self, note_count: int, **kwargs):
+        self.note_count = note_count
+        super().__init__(**kwargs)
+
+    def compose(self):
+        with Vertical(id="jumpContainer"):
+            yield Label(f"Jump to note (1-{self.note_count})", id="jumpTitle")
+            yield Input(placeholder="Note number...", type="integer", id="jumpInput")
+
+    def on_mount(self) -> None:
+        self.query_one("#jumpInput", Input).focus()
+
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        try:
+            self.dismiss(int(event.value))
+        except ValueError:
+            self.dismiss(None)
+
+    def action_dismiss(self):
+        self.dismiss()
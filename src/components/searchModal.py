@@ -1,62 +1,113 @@
+from textual import work
 from textual.screen import ModalScreen
 from textual.widgets import Input, Button, ListView, ListItem, Label
 from textual.containers import Vertical, Horizontal
+from textual.worker import get_current_worker
 from models import Note
 
 class SearchModal(ModalScreen[Note]):
     """Search notes by title, content, or tags"""
-    
-    BINDINGS = [("escape", "dismiss", "Close")] 
+
+    BINDINGS = [("escape", "dismiss", "Close")]
+    DEBOUNCE_SECONDS = 0.15
+    CHUNK_SIZE = 50
     all_notes: list = []
-    matching_notes: list = [] 
-    
+    matching_notes: list = []
+
     def __init__(self, notes: list, **kwargs):
         self.all_notes = notes
         self.matching_notes = []
+        # Lower-cased "title\ncontent\ntags" per note, built once by the first search
+        self.haystacks = None
+        # Bumped on every keystroke so chunks from superseded searches are dropped
+        self.search_generation = 0
+        self.debounce_timer = None
         super().__init__(**kwargs)
-    
+
     def compose(self):
         with Vertical(id="searchContainer"):
             yield Label("🔍 Search Notes", id="searchTitle")
             yield Input(placeholder="Search by title, content, or tags...", id="searchInput")
+            yield Label("", id="searchStatus")
             yield ListView(id="searchResults")
             with Horizontal(id="searchButtons"):
                 yield Button("Close", variant="primary", id="close")
-    
+
     def on_mount(self) -> None:
         """Focus input when modal opens"""
         self.query_one("#searchInput", Input).focus()
-    
+
     def on_input_changed(self, event: Input.Changed) -> None:
-        """Filter notes as user types"""
+        """Restart the search a moment after the user stops typing"""
         search_term = event.value.lower().strip()
+        self.search_generation += 1
+        if self.debounce_timer is not None:
+            self.debounce_timer.stop()
+            self.debounce_timer = None
+        self.workers.cancel_group(self, "search")
+
         results_view = self.query_one("#searchResults", ListView)
-        
-        # Clear previous results
+        status = self.query_one("#searchStatus", Label)
         results_view.clear()
         self.matching_notes = []
-        
+
         if not search_term:
+            status.update("")
             results_view.append(ListItem(Label("Type to search...")))
             return
-        
-        # Filter notes
-        for note in self.all_notes:
-            if (search_term in note.noteTitle.lower() or 
-                search_term in note.content.lower() or 
-                search_term in note.tags.lower()):
-                self.matching_notes.append(note)
-        
-        # Display results
-        if self.matching_notes:
-            for note in self.matching_notes:
+
+        status.update("Searching…")
+        generation = self.search_generation
+        self.debounce_timer = self.set_timer(
+            self.DEBOUNCE_SECONDS, lambda: self.run_search(search_term, generation)
+        )
+
+    @work(thread=True, exclusive=True, group="search")
+    def run_search(self, search_term: str, generation: int) -> None:
+        """Filter notes off the UI thread, streaming matches back in chunks"""
+        worker = get_current_worker()
+        if self.haystacks is None:
+            self.haystacks = [
+                f"{note.noteTitle}\n{note.content}\n{note.tags}".lower()
+                for note in self.all_notes
+            ]
+
+        chunk = []
+        for note, haystack in zip(self.all_notes, self.haystacks):
+            if worker.is_cancelled:
+                return
+            if search_term in haystack:
+                chunk.append(note)
+                if len(chunk) >= self.CHUNK_SIZE:
+                    self.app.call_from_thread(self.show_results, chunk, generation)
+                    chunk = []
+
+        if worker.is_cancelled:
+            return
+        self.app.call_from_thread(self.show_results, chunk, generation, True)
+
+    def show_results(self, notes: list, generation: int, done: bool = False) -> None:
+        """Append a chunk of matches, ignoring chunks from an outdated query"""
+        if generation != self.search_generation or not self.is_attached:
+            return
+        results_view = self.query_one("#searchResults", ListView)
+
+        if notes:
+            self.matching_notes.extend(notes)
+            items = []
+            for note in notes:
                 preview = note.content[:50] + "..." if len(note.content) > 50 else note.content
-                results_view.append(
-                    ListItem(Label(f"📌 {note.noteTitle}\n   {preview}"))
-                )
-        else:
-            results_view.append(ListItem(Label("❌ No notes found")))
-    
+                items.append(ListItem(Label(f"📌 {note.noteTitle}\n   {preview}")))
+            results_view.extend(items)
+
+        if done:
+            status = self.query_one("#searchStatus", Label)
+            if self.matching_notes:
+                status.update(f"{len(self.matching_notes)} notes found")
+            else:
+                status.update("")
+                results_view.append(ListItem(Label("❌ No notes found")))
+
     def on_list_view_selected(self, event: ListView.Selected) -> None:
         """When user clicks on a search result"""
         if event.list_view.index is not None:
@@ -64,10 +115,10 @@ class SearchModal(ModalScreen[Note]):
             if 0 <= index < len(self.matching_notes):
                 selected_note = self.matching_notes[index]
                 self.dismiss(selected_note)  # Return the selected note
-    
+
     def on_button_pressed(self, event: Button.Pressed) -> None:
         if event.button.id == "close":
             self.dismiss(None)  # Return None when closing
 
     def action_dismiss(self):
-        self.dismiss()
\ No newline at end of file
+        self.dismiss()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Sticky Notes daemon - keeps the notes store warm for cli.py and the TUI
+
+Usage:
+    python daemon.py            # run in the foreground
+    python cli.py daemon start  # run in the background
+
+The daemon owns a NoteStore (notes.json plus the duplicate index) and serves
+it over a Unix domain socket next to notes.json. open_notes() gives callers
+the daemon when one is running and a LocalNotes over notes.json otherwise;
+both take the same requests. Clients send one JSON line per batch:
+
+    {"batch": [{"op": "add", "args": {...}}, {"op": "list", "args": {...}}]}
+
+and get one JSON line back with a result per request:
+
+    {"results": [{"ok": true, "result": ...}, {"ok": false, "error": "..."}]}
+
+A batch is applied under one lock and written to notes.json once, so the
+file stays the source of truth for anything not talking to the daemon.
+"""
+
+import json
+import os
+import signal
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from notestore import NoteStore, get_storage_path
+
+SOCKET_FILENAME = 'notesd.sock'
+CONNECT_TIMEOUT = 2.0
+# Longest wait for a batch's answer; dedupe over a large store is the slowest request
+REQUEST_TIMEOUT = 60.0
+
+
+def get_socket_path(storage_path: Path = None) -> Path:
+    """Get the daemon socket path, stored next to notes.json."""
+    return (storage_path or get_storage_path()).parent / SOCKET_FILENAME
+
+
+class DaemonError(Exception):
+    """A request failed inside the daemon, or the daemon did not answer."""
+
+
+class NotesClient(ABC):
+    """Common front for the daemon connection and direct file access."""
+
+    @abstractmethod
+    def batch(self, requests: list) -> list:
+        """Run (op, args) pairs together; returns per-request results."""
+
+    def call(self, op: str, **args):
+        result = self.batch([(op, args)])[0]
+        if not result['ok']:
+            raise DaemonError(result['error'])
+        return result['result']
+
+    def close(self):
+        pass
+
+
+class NoteOps:
+    """The requests a notes store answers, shared by the daemon and LocalNotes."""
+
+    def __init__(self, store: NoteStore):
+        self.store = store
+        self.lock = threading.Lock()
+
+    def run_batch(self, batch: list) -> list:
+        results = []
+        with self.lock:
+            self.store.reload_if_changed()
+            for request in batch:
+                try:
+                    handler = getattr(self, f"op_{request['op']}")
+                    results.append({'ok': True, 'result': handler(**request.get('args', {}))})
+                except Exception as e:
+                    results.append({'ok': False, 'error': f"{type(e).__name__}: {e}"})
+            try:
+                self.store.flush()
+            except OSError as e:
+                results = [{'ok': False, 'error': f"could not save notes: {e}"}] * len(batch)
+            # Commit the index too, so no write transaction is held open between batches
+            self.store.save_index()
+        return results
+
+    def op_ping(self):
+        return {'pid': os.getpid(), 'notes': len(self.store.notes), 'version': self.store.version}
+
+    def op_add(self, note: dict, check_duplicates: bool = True):
+        return {'note': note, 'duplicates': self.store.add(note, check_duplicates)}
+
+    def op_list(self, limit: int = 10):
+        return {'total': len(self.store.notes), 'notes': self.store.recent(limit)}
+
+    def op_search(self, keyword: str):
+        return self.store.search(keyword)
+
+    def op_dedupe(self, threshold: float, merge: bool = False):
+        groups, merges = self.store.dedupe(threshold, merge)
+        return {'groups': groups, 'merges': merges, 'total': len(self.store.notes)}
+
+    def op_get_notes(self):
+        return {'notes': self.store.notes, 'version': self.store.version}
+
+    def op_replace_notes(self, notes: list, base_version: int = None):
+        self.store.replace(notes, base_version)
+        return {'version': self.store.version}
+
+
+class LocalNotes(NoteOps, NotesClient):
+    """Direct access to notes.json, used when no daemon is running."""
+
+    def __init__(self, storage_path: Path = None):
+        super().__init__(NoteStore(storage_path))
+
+    def batch(self, requests: list) -> list:
+        return self.run_batch([{'op': op, 'args': args} for op, args in requests])
+
+    def close(self):
+        self.store.close()
+
+
+class DaemonClient(NotesClient):
+    """Connection to a running notes daemon."""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.reader = sock.makefile('r', encoding='utf-8')
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+    def batch(self, requests: list) -> list:
+        payload = {'batch': [{'op': op, 'args': args} for op, args in requests]}
+        try:
+            self.sock.sendall(json.dumps(payload, ensure_ascii=False).encode('utf-8') + b'\n')
+            line = self.reader.readline()
+        except TimeoutError:
+            # A late answer would be read as the next batch's, so drop the connection
+            self.close()
+            raise DaemonError(f"notes daemon did not answer within {REQUEST_TIMEOUT:g}s") from None
+        except OSError as e:
+            self.close()
+            raise DaemonError(f"lost connection to the notes daemon: {e}") from None
+        if not line:
+            self.close()
+            raise DaemonError("notes daemon closed the connection")
+        return json.loads(line)['results']
+
+
+def connect(socket_path: Path = None) -> DaemonClient | None:
+    """Connect to the daemon, or return None when none is running."""
+    if not hasattr(socket, 'AF_UNIX'):
+        return None
+    socket_path = socket_path or get_socket_path()
+    if not socket_path.exists():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(CONNECT_TIMEOUT)
+    try:
+        sock.connect(str(socket_path))
+    except OSError:
+        sock.close()
+        return None
+    sock.settimeout(REQUEST_TIMEOUT)
+    return DaemonClient(sock)
+
+
+def open_notes(storage_path: Path = None) -> NotesClient:
+    """The running daemon if there is one, otherwise direct access to notes.json."""
+    return connect(get_socket_path(storage_path)) or LocalNotes(storage_path)
+
+
+class NotesRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                batch = json.loads(line)['batch']
+                if not isinstance(batch, list) or not all(
+                        isinstance(r, dict) and isinstance(r.get('op'), str)
+                        and isinstance(r.get('args', {}), dict) for r in batch):
+                    raise TypeError("'batch' must be a list of {'op': name, 'args': {...}} objects")
+            except (ValueError, KeyError, TypeError) as e:
+                response = {'results': [{'ok': False, 'error': f"bad request: {e}"}]}
+            else:
+                response = {'results': self.server.run_batch(batch)}
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+class NotesDaemon(NoteOps, socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, store: NoteStore):
+        NoteOps.__init__(self, store)
+        socketserver.ThreadingUnixStreamServer.__init__(self, str(socket_path), NotesRequestHandler)
+        os.chmod(socket_path, 0o600)
+
+    def op_shutdown(self):
+        threading.Thread(target=self.shutdown, daemon=True).start()
+        return True
+
+
+def serve(storage_path: Path = None):
+    """Run the daemon in the foreground until it is shut down."""
+    storage_path = storage_path or get_storage_path()
+    socket_path = get_socket_path(storage_path)
+
+    client = connect(socket_path)
+    if client is not None:
+        client.close()
+        print(f"Notes daemon already running on {socket_path}", file=sys.stderr)
+        return 1
+    # Left behind by a daemon that did not shut down cleanly
+    socket_path.unlink(missing_ok=True)
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+
+    store = NoteStore(storage_path, full_index=True)
+    store.duplicate_index()
+    store.save_index()
+    server = NotesDaemon(socket_path, store)
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown, daemon=True).start())
+    print(f"Notes daemon serving {len(store.notes)} notes on {socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        socket_path.unlink(missing_ok=True)
+        with server.lock:
+            store.flush()
+            store.save_index()
+    return 0
+
+
+def start_background(timeout: float = 10.0) -> bool:
+    """Spawn a detached daemon and wait until it accepts connections."""
+    subprocess.Popen(
+        [sys.executable, str(Path(__file__).resolve())],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        client = connect()
+        if client is not None:
+            client.close()
+            return True
+        time.sleep(0.05)
+    return False
+
+
+if __name__ == '__main__':
+    sys.exit(serve())
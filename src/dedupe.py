@@ -0,0 +1,376 @@
+"""
+Near-duplicate detection for notes using shingling + MinHash/LSH.
+
+Each note's title and content are split into word shingles, summarised as a
+one-permutation MinHash signature and cut into LSH bands. Notes that share a band bucket are
+candidates; candidates are confirmed with the exact Jaccard similarity of
+their shingle sets, so the full collection is never compared pairwise.
+
+Signatures and band keys are persisted in a SQLite file next to notes.json,
+so the index can be updated incrementally and probed cheaply when a single
+note is added.
+"""
+
+import json
+import math
+import operator
+import sqlite3
+import string
+import struct
+import sys
+import zlib
+from pathlib import Path
+
+INDEX_FILENAME = 'dedupe-index.sqlite3'
+INDEX_VERSION = 4
+
+SHINGLE_SIZE = 3
+# Signature slots, shared out among the LSH bands
+NUM_PERM = 64
+DEFAULT_THRESHOLD = 0.6
+# Share of pairs at exactly the threshold that LSH has to turn into candidates
+RECALL_TARGET = 0.95
+# Lowest threshold NUM_PERM one-slot bands can serve at RECALL_TARGET
+MIN_THRESHOLD = 0.05
+# Signature estimates this close to the threshold are confirmed with exact Jaccard
+SIGNATURE_MARGIN = 0.1
+
+# Punctuation becomes word breaks; translate + split is several times faster than \w+
+_PUNCTUATION = str.maketrans({c: ' ' for c in string.punctuation + '“”‘’«»–—…'})
+
+
+def band_params(threshold: float) -> tuple:
+    """
+    (bands, rows per band) that find pairs at `threshold` similarity.
+
+    A pair with similarity s shares a bucket with probability
+    1 - (1 - s**rows)**bands. More rows per band let fewer dissimilar pairs
+    through, so this takes the most rows that still reach RECALL_TARGET
+    at the threshold within NUM_PERM slots.
+    """
+    if not MIN_THRESHOLD <= threshold <= 1:
+        raise ValueError(f"similarity threshold must be between {MIN_THRESHOLD} and 1")
+    for rows in range(NUM_PERM, 0, -1):
+        p = threshold ** rows
+        if p >= 1:
+            return 1, rows
+        if p == 0:
+            continue
+        bands = max(1, math.ceil(math.log(1 - RECALL_TARGET) / math.log1p(-p)))
+        if bands * rows <= NUM_PERM:
+            return bands, rows
+    return NUM_PERM, 1
+
+
+# The stored index is banded for the default threshold (13 bands of 3 rows);
+# groups() re-bands the stored signatures for other thresholds
+NUM_BANDS, ROWS_PER_BAND = band_params(DEFAULT_THRESHOLD)
+
+# Shingle hashes are 64-bit: the top bits pick a MinHash bin, the rest is the value
+_BIN_SHIFT = 64 - (NUM_PERM.bit_length() - 1)
+_BIN_MASK = NUM_PERM - 1
+_VALUE_MASK = (1 << _BIN_SHIFT) - 1
+_BAND_STRUCT = struct.Struct(f'<{ROWS_PER_BAND}Q')
+# Stored signatures keep 32 bits per slot: enough to tell equal slots apart
+_SIGNATURE_STRUCT = struct.Struct(f'<{NUM_PERM}I')
+_MASK32 = (1 << 32) - 1
+_KEYS_STRUCT = struct.Struct(f'<{NUM_BANDS}Q')
+
+
+def note_text(title: str, content: str) -> str:
+    """Text of a note that is compared for similarity."""
+    return f"{title or ''}\n{content or ''}"
+
+
+def fingerprint(text: str) -> int:
+    """Cheap checksum used to detect notes edited since they were indexed."""
+    return zlib.crc32(text.encode('utf-8'))
+
+
+def words_of(text: str) -> list:
+    return text.lower().translate(_PUNCTUATION).split()
+
+
+def word_shingles(text: str) -> set:
+    """Word n-grams of `text`; texts shorter than one shingle become a single shingle."""
+    words = words_of(text)
+    if len(words) < SHINGLE_SIZE:
+        return {tuple(words)} if words else set()
+    return set(zip(*(words[i:] for i in range(SHINGLE_SIZE))))
+
+
+def shingles(text: str) -> set:
+    """64-bit hashes (possibly negative) of the word shingles of `text`, as used for MinHash."""
+    words = words_of(text)
+    if len(words) < SHINGLE_SIZE:
+        if not words:
+            return set()
+        return {hash((zlib.crc32(' '.join(words).encode('utf-8')),))}
+    # Hash each word once, then hash each run of neighbouring word hashes.
+    # hash() of an int tuple is not salted per process (unlike str), only
+    # tied to the Python version, which the index records.
+    h = list(map(zlib.crc32, map(str.encode, words)))
+    return set(map(hash, zip(*(h[i:] for i in range(SHINGLE_SIZE)))))
+
+
+def minhash(shingle_set: set) -> list:
+    """
+    MinHash signature of a non-empty shingle set.
+
+    One hash per shingle is split into NUM_PERM bins (one-permutation hashing);
+    empty bins borrow the next filled bin's minimum so every slot is comparable.
+    """
+    bins = [None] * NUM_PERM
+    for h in shingle_set:
+        b = (h >> _BIN_SHIFT) & _BIN_MASK
+        v = h & _VALUE_MASK
+        if bins[b] is None or v < bins[b]:
+            bins[b] = v
+    signature = list(bins)
+    for i in range(NUM_PERM):
+        if signature[i] is None:
+            for distance in range(1, NUM_PERM):
+                v = bins[(i + distance) % NUM_PERM]
+                if v is not None:
+                    signature[i] = v + (distance << _BIN_SHIFT)
+                    break
+    return signature
+
+
+def band_keys(signature: list) -> list:
+    """One LSH bucket key per band of the signature."""
+    return [
+        (band << 32) | zlib.crc32(_BAND_STRUCT.pack(*signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]))
+        for band in range(NUM_BANDS)
+    ]
+
+
+def pack_signature(signature: list) -> bytes:
+    return _SIGNATURE_STRUCT.pack(*map(_MASK32.__and__, signature))
+
+
+def estimate_similarity(a: tuple, b: tuple) -> float:
+    """Jaccard estimate from two unpacked stored signatures."""
+    return sum(map(operator.eq, a, b)) / NUM_PERM
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    common = len(a & b)
+    return common / (len(a) + len(b) - common)
+
+
+class DuplicateIndex:
+    """
+    Incrementally maintained LSH index over note texts, keyed by note_id.
+
+    The index lives in a SQLite file so probing for one note is a handful of
+    indexed lookups, and adding one note writes a few rows instead of the
+    whole index.
+    """
+
+    def __init__(self, path: Path = None):
+        self.path = path
+        self.db = None
+
+    def load(self) -> 'DuplicateIndex':
+        """Open the persisted index; a missing or incompatible index starts out empty."""
+        try:
+            self._open()
+        except sqlite3.OperationalError:
+            # Locked or unreadable right now, which says nothing about its contents
+            self.close()
+            raise
+        except sqlite3.DatabaseError:
+            # Not an index we can read (corrupt, or an older format): rebuild it
+            self.close()
+            self.path.unlink(missing_ok=True)
+            self._open()
+        return self
+
+    def _open(self):
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        # The daemon uses the index from its request threads, one at a time under its lock
+        self.db = sqlite3.connect(str(self.path) if self.path else ':memory:', check_same_thread=False)
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        params = json.dumps([INDEX_VERSION, NUM_PERM, NUM_BANDS, ROWS_PER_BAND, SHINGLE_SIZE,
+                             sys.version_info[:2]])
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'params'").fetchone()
+        if row is None or row[0] != params:
+            self.db.execute("DROP TABLE IF EXISTS notes")
+            self.db.execute("DROP TABLE IF EXISTS buckets")
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES ('params', ?)", (params,))
+        self.db.execute("CREATE TABLE IF NOT EXISTS notes "
+                        "(note_id TEXT PRIMARY KEY, fingerprint INTEGER, size INTEGER, signature BLOB, band_keys BLOB)")
+        # One B-tree keyed by bucket: probes read a key prefix, removals use the
+        # note's stored band_keys, so no secondary index has to be maintained
+        self.db.execute("CREATE TABLE IF NOT EXISTS buckets (band_key INTEGER, note_id TEXT, "
+                        "PRIMARY KEY (band_key, note_id)) WITHOUT ROWID")
+        self.db.commit()
+
+    def save(self):
+        if self.db is not None:
+            self.db.commit()
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+
+    def __contains__(self, note_id):
+        return self.db.execute("SELECT 1 FROM notes WHERE note_id = ?", (note_id,)).fetchone() is not None
+
+    def note_ids(self) -> set:
+        return {row[0] for row in self.db.execute("SELECT note_id FROM notes")}
+
+    def _rows(self, note_id: str, text: str, fp: int) -> tuple:
+        """(notes row, buckets rows) for a note; notes without words get no buckets."""
+        shingle_set = shingles(text)
+        if not shingle_set:
+            return (note_id, fp, 0, None, None), []
+        signature = minhash(shingle_set)
+        keys = band_keys(signature)
+        note_row = (note_id, fp, len(shingle_set), pack_signature(signature), _KEYS_STRUCT.pack(*keys))
+        return note_row, [(key, note_id) for key in keys]
+
+    def _drop_buckets(self, note_ids: list):
+        rows = []
+        for note_id in note_ids:
+            row = self.db.execute("SELECT band_keys FROM notes WHERE note_id = ?", (note_id,)).fetchone()
+            if row is not None and row[0] is not None:
+                rows.extend((key, note_id) for key in _KEYS_STRUCT.unpack(row[0]))
+        self.db.executemany("DELETE FROM buckets WHERE band_key = ? AND note_id = ?", rows)
+
+    def _write(self, note_rows: list, bucket_rows: list, replaced: list):
+        self._drop_buckets(replaced)
+        self.db.executemany("INSERT OR REPLACE INTO notes VALUES (?, ?, ?, ?, ?)", note_rows)
+        self.db.executemany("INSERT OR IGNORE INTO buckets VALUES (?, ?)", bucket_rows)
+
+    def add(self, note_id: str, text: str):
+        """Index (or re-index) a note."""
+        fp = fingerprint(text)
+        row = self.db.execute("SELECT fingerprint FROM notes WHERE note_id = ?", (note_id,)).fetchone()
+        if row is not None and row[0] == fp:
+            return
+        note_row, bucket_rows = self._rows(note_id, text, fp)
+        self._write([note_row], bucket_rows, [note_id] if row is not None else [])
+
+    def remove(self, note_id: str):
+        self._drop_buckets([note_id])
+        self.db.execute("DELETE FROM notes WHERE note_id = ?", (note_id,))
+
+    def sync(self, texts_by_id: dict):
+        """Bring the index in line with the current notes, re-hashing only what changed."""
+        known = dict(self.db.execute("SELECT note_id, fingerprint FROM notes"))
+        for note_id in known.keys() - texts_by_id.keys():
+            self.remove(note_id)
+        note_rows, bucket_rows, replaced = [], [], []
+        for note_id, text in texts_by_id.items():
+            fp = fingerprint(text)
+            old_fp = known.get(note_id)
+            if old_fp == fp:
+                continue
+            if old_fp is not None:
+                replaced.append(note_id)
+            note_row, rows = self._rows(note_id, text, fp)
+            note_rows.append(note_row)
+            bucket_rows.extend(rows)
+        self._write(note_rows, bucket_rows, replaced)
+
+    def candidates(self, text: str) -> set:
+        """note_ids sharing at least one LSH bucket with `text`."""
+        shingle_set = shingles(text)
+        if not shingle_set:
+            return set()
+        keys = band_keys(minhash(shingle_set))
+        rows = self.db.execute(
+            f"SELECT note_id FROM buckets WHERE band_key IN ({','.join('?' * len(keys))})", keys)
+        return {row[0] for row in rows}
+
+    def find_similar(self, text: str, texts_by_id: dict,
+                     threshold: float = DEFAULT_THRESHOLD) -> list:
+        """
+        (note_id, similarity) pairs for notes similar to `text`, best first.
+
+        Candidates come from the stored bands, which are tuned for
+        DEFAULT_THRESHOLD; lower thresholds miss more of the weaker matches.
+        """
+        words = word_shingles(text)
+        matches = []
+        for note_id in self.candidates(text):
+            other = texts_by_id.get(note_id)
+            if other is None:
+                continue
+            score = jaccard(words, word_shingles(other))
+            if score >= threshold:
+                matches.append((note_id, score))
+        matches.sort(key=lambda m: m[1], reverse=True)
+        return matches
+
+    def groups(self, texts_by_id: dict, threshold: float = DEFAULT_THRESHOLD) -> list:
+        """
+        Groups (lists of note_ids) of notes linked by similarity, largest first.
+
+        The stored signatures are banded for `threshold` (see band_params()),
+        so lowering it finds less similar pairs at the same recall, at the cost
+        of more candidates to check. Pairs are judged by how many MinHash slots
+        their signatures share; pairs whose estimate lands near the threshold,
+        and notes too short for a reliable estimate, get an exact Jaccard check.
+        """
+        bands, rows = band_params(threshold)
+        parent = {}
+
+        def find(x):
+            parent.setdefault(x, x)
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        signatures = {}
+        sizes = {}
+        for note_id, size, signature in self.db.execute(
+                "SELECT note_id, size, signature FROM notes WHERE signature IS NOT NULL"):
+            if note_id in texts_by_id:
+                signatures[note_id] = _SIGNATURE_STRUCT.unpack(signature)
+                sizes[note_id] = size
+        buckets = {}
+        for note_id, signature in signatures.items():
+            for band in range(bands):
+                buckets.setdefault((band, signature[band * rows:(band + 1) * rows]), []).append(note_id)
+        shingle_cache = {}
+
+        def similarity(a, b):
+            # Sets smaller than the signature leave most slots densified copies
+            if sizes[a] >= NUM_PERM and sizes[b] >= NUM_PERM:
+                estimate = estimate_similarity(signatures[a], signatures[b])
+                if abs(estimate - threshold) > SIGNATURE_MARGIN:
+                    return estimate
+            for note_id in (a, b):
+                if note_id not in shingle_cache:
+                    shingle_cache[note_id] = word_shingles(texts_by_id[note_id])
+            return jaccard(shingle_cache[a], shingle_cache[b])
+
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            # Compare against the bucket's first note rather than every pair, so a
+            # large bucket of boilerplate notes stays linear
+            rep = members[0]
+            for note_id in members[1:]:
+                if find(note_id) == find(rep):
+                    continue
+                if similarity(rep, note_id) >= threshold:
+                    parent[find(note_id)] = find(rep)
+
+        grouped = {}
+        for note_id in parent:
+            grouped.setdefault(find(note_id), []).append(note_id)
+        result = [members for members in grouped.values() if len(members) > 1]
+        result.sort(key=len, reverse=True)
+        return result
@@ -0,0 +1,66 @@
+class GridNavigator:
+    """Tracks the focused note as a (row, col) position in the notes grid"""
+
+    def __init__(self, columns: int = 3):
+        self.columns = max(1, columns)
+        self.count = 0
+        self.index = 0
+
+    @property
+    def row(self) -> int:
+        return self.index // self.columns
+
+    @property
+    def col(self) -> int:
+        return self.index % self.columns
+
+    @property
+    def row_count(self) -> int:
+        return -(-self.count // self.columns)
+
+    def resize(self, columns: int):
+        """Change the column count; the flat index (and so the note) stays put"""
+        self.columns = max(1, columns)
+
+    def sync(self, index: int, count: int):
+        """Update position after focus moved by other means (mouse, sort, delete)"""
+        self.count = count
+        self.index = self.clamp(index)
+
+    def clamp(self, index: int) -> int:
+        if self.count == 0:
+            return 0
+        return max(0, min(index, self.count - 1))
+
+    def index_at(self, row: int, col: int) -> int:
+        return self.clamp(row * self.columns + col)
+
+    def move_rows(self, rows: int) -> int:
+        """Target index `rows` rows away, keeping the column where possible"""
+        last_row = max(0, self.row_count - 1)
+        row = max(0, min(self.row + rows, last_row))
+        return self.index_at(row, self.col)
+
+    def up(self) -> int:
+        return self.move_rows(-1)
+
+    def down(self) -> int:
+        return self.move_rows(1)
+
+    def page_up(self, rows_per_page: int) -> int:
+        return self.move_rows(-max(1, rows_per_page))
+
+    def page_down(self, rows_per_page: int) -> int:
+        return self.move_rows(max(1, rows_per_page))
+
+    def home(self) -> int:
+        return 0
+
+    def end(self) -> int:
+        return self.clamp(self.count - 1)
+
+    def jump(self, number: int) -> int | None:
+        """Index of the 1-based note `number`, or None if out of range"""
+        if 1 <= number <= self.count:
+            return number - 1
+        return None
@@ -0,0 +1,372 @@
+"""
+Dict-level access to notes.json, shared by cli.py and the notes daemon.
+
+A NoteStore holds the notes as the raw dicts found in notes.json (so fields
+the TUI does not know about, like session metadata, survive round trips)
+together with the near-duplicate index. Changes are kept in memory until
+flush() writes them, which lets a caller apply a batch of changes with a
+single write.
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from dedupe import DEFAULT_THRESHOLD, INDEX_FILENAME, DuplicateIndex, jaccard, note_text, word_shingles
+
+
+def get_storage_path():
+    """Get the notes.json path based on platform."""
+    if os.name == 'nt':  # Windows
+        app_data = os.environ.get('APPDATA', os.path.join(os.path.expanduser('~'), 'AppData', 'Roaming'))
+        return Path(app_data) / 'StickyNotes' / 'notes.json'
+    elif sys.platform == 'darwin':  # macOS
+        return Path.home() / 'Library' / 'Application Support' / 'StickyNotes' / 'notes.json'
+    else:  # Linux
+        xdg_data = os.environ.get('XDG_DATA_HOME', Path.home() / '.local' / 'share')
+        return Path(xdg_data) / 'sticky-notes' / 'notes.json'
+
+
+def load_notes(filepath: Path) -> list:
+    """Load notes from JSON file."""
+    if not filepath.exists():
+        return []
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_notes(filepath: Path, notes: list):
+    """Save notes to JSON file, replacing it atomically so readers never see half a file."""
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = filepath.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(notes, f, indent=2, ensure_ascii=False)
+    tmp_path.replace(filepath)
+
+
+def backup_notes(filepath: Path):
+    """Copy notes.json into the backups folder used by the TUI."""
+    if filepath.exists():
+        backup_dir = filepath.parent / 'backups'
+        backup_dir.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        shutil.copy2(filepath, backup_dir / f"notes-{timestamp}.json")
+
+        # Keep only last 20 backups, as the TUI does
+        backups = sorted(backup_dir.glob("notes-*.json"), reverse=True)
+        for old_backup in backups[20:]:
+            old_backup.unlink()
+
+
+def get_note_title(note: dict, default: str = 'Untitled') -> str:
+    return note.get('noteTitle', note.get('title', default))
+
+
+def get_note_text(note: dict) -> str:
+    """Text of a stored note as compared by the duplicate detector."""
+    return note_text(get_note_title(note, ''), note.get('content', ''))
+
+
+def get_note_tags(note: dict) -> str:
+    tags = note.get('tags', '')
+    if isinstance(tags, list):
+        tags = ','.join(tags)
+    return tags
+
+
+def merge_notes(stored: list, notes: list, known_ids: set,
+                deleted_ids: set = frozenset(), stored_fields: dict = None) -> list:
+    """
+    Merge a client's full list of notes into the stored ones.
+
+    Stored fields the client does not send are kept, as are the fields named
+    in `stored_fields` (note_id -> field names changed since the client
+    loaded). Notes in `deleted_ids` were removed since the client loaded and
+    are not brought back. Stored notes whose id is not in `known_ids` (ones
+    the client never loaded) are kept after the client's notes; any other
+    stored note missing from `notes` is dropped.
+    """
+    stored_fields = stored_fields or {}
+    stored_by_id = {n['note_id']: n for n in stored if n.get('note_id')}
+    merged = []
+    incoming = set()
+    for note in notes:
+        note_id = note.get('note_id')
+        incoming.add(note_id)
+        if note_id in deleted_ids:
+            continue
+        existing = stored_by_id.get(note_id)
+        if existing:
+            note = {**existing, **note, **{f: existing[f] for f in stored_fields.get(note_id, ()) if f in existing}}
+        merged.append(note)
+    merged.extend(
+        n for n in stored
+        if n.get('note_id') and n['note_id'] not in incoming and n['note_id'] not in known_ids
+    )
+    return merged
+
+
+class NoteStore:
+    """notes.json and its duplicate index, loaded into memory."""
+
+    def __init__(self, filepath: Path = None, full_index: bool = False):
+        self.filepath = filepath or get_storage_path()
+        self.index_path = self.filepath.parent / INDEX_FILENAME
+        # Long-lived owners (the daemon) re-check every note against the index;
+        # one-shot CLI runs only hash notes the index has never seen
+        self.full_index = full_index
+        self.notes = []
+        self.notes_by_id = {}
+        self.index = None
+        self.index_stale = True
+        # Bumped on every change; note_id -> version the note appeared in or
+        # was removed in, and note_id -> {field: version} for fields changed
+        # other than by replace(), so a client saving an older view loses neither
+        self.version = 0
+        self.added_version = {}
+        self.removed_version = {}
+        self.field_version = {}
+        self.dirty = False
+        self.backup_pending = False
+        self.file_stamp = None
+        self.load()
+
+    def _stat(self):
+        try:
+            st = self.filepath.stat()
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def load(self):
+        previous = self.notes_by_id
+        self.file_stamp = self._stat()
+        self.notes = load_notes(self.filepath)
+        self.notes_by_id = {n['note_id']: n for n in self.notes if n.get('note_id')}
+        for note_id in self.notes_by_id:
+            self.added_version.setdefault(note_id, self.version)
+        # Record what another writer changed in the file
+        for note_id, old in previous.items():
+            new = self.notes_by_id.get(note_id)
+            if new is None:
+                self.removed_version[note_id] = self.version
+            elif new != old:
+                self._fields_changed(note_id, [f for f in old.keys() | new.keys() if old.get(f) != new.get(f)])
+        self.index_stale = True
+        self.dirty = False
+
+    def reload_if_changed(self) -> bool:
+        """Pick up writes made to notes.json by something other than this store."""
+        if self._stat() == self.file_stamp:
+            return False
+        self.version += 1
+        self.load()
+        return True
+
+    def flush(self):
+        """Write pending changes to notes.json."""
+        if not self.dirty:
+            return
+        if self.backup_pending:
+            backup_notes(self.filepath)
+            self.backup_pending = False
+        save_notes(self.filepath, self.notes)
+        self.file_stamp = self._stat()
+        self.dirty = False
+
+    def close(self):
+        if self.index is not None:
+            self.index.close()
+            self.index = None
+
+    def _fields_changed(self, note_id: str, fields: list):
+        versions = self.field_version.setdefault(note_id, {})
+        for field in fields:
+            versions[field] = self.version
+
+    def save_index(self):
+        if self.index is None:
+            return
+        try:
+            self.index.save()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Could not update duplicate index: {e}", file=sys.stderr)
+
+    def _changed(self, backup: bool = False):
+        self.version += 1
+        self.dirty = True
+        self.backup_pending = self.backup_pending or backup
+
+    def duplicate_index(self) -> DuplicateIndex:
+        if self.index is None:
+            self.index = DuplicateIndex(self.index_path).load()
+        if self.index_stale:
+            if self.full_index:
+                self.index.sync(self.texts_by_id())
+            else:
+                indexed = self.index.note_ids()
+                for note_id, note in self.notes_by_id.items():
+                    if note_id not in indexed:
+                        self.index.add(note_id, get_note_text(note))
+            self.index_stale = False
+        return self.index
+
+    def texts_by_id(self) -> dict:
+        return {note_id: get_note_text(n) for note_id, n in self.notes_by_id.items()}
+
+    def find_duplicates(self, note: dict, limit: int = 3) -> list:
+        """Likely duplicates of `note` as {'note_id', 'title', 'score'} dicts."""
+        index = self.duplicate_index()
+        text = get_note_text(note)
+        matches = index.find_similar(text, {
+            note_id: get_note_text(self.notes_by_id[note_id])
+            for note_id in index.candidates(text)
+            if note_id in self.notes_by_id
+        })
+        return [
+            {'note_id': note_id, 'title': get_note_title(self.notes_by_id[note_id]), 'score': score}
+            for note_id, score in matches[:limit]
+        ]
+
+    def add(self, note: dict, check_duplicates: bool = True) -> list:
+        """Add a note dict, returning likely duplicates found before it was added."""
+        duplicates = self.find_duplicates(note) if check_duplicates else []
+        self.notes.append(note)
+        self.notes_by_id[note['note_id']] = note
+        self._changed()
+        self.added_version[note['note_id']] = self.version
+        if self.index is not None:
+            self.index.add(note['note_id'], get_note_text(note))
+        return duplicates
+
+    def recent(self, limit: int = 10) -> list:
+        """Most recently updated notes first."""
+        notes = sorted(self.notes, key=lambda n: n.get('updated_at', ''), reverse=True)
+        return notes[:limit]
+
+    def search(self, keyword: str) -> list:
+        keyword_lower = keyword.lower()
+        return [
+            note for note in self.notes
+            if keyword_lower in get_note_title(note, '').lower()
+            or keyword_lower in note.get('content', '').lower()
+            or keyword_lower in get_note_tags(note).lower()
+        ]
+
+    def dedupe(self, threshold: float = DEFAULT_THRESHOLD, merge: bool = False) -> tuple:
+        """
+        Group near-duplicate notes; with merge, keep one note of each group
+        (see keeper()) with the group's tags and delete the rest.
+
+        Groups are linked pairwise, so a note can be in a group only through
+        another member. A note that is not itself similar to the kept one has
+        its content appended to the kept note rather than dropped.
+
+        Returns (groups as lists of note dicts, merges as {'kept': note_id,
+        'removed': [note_id, ...], 'appended': [note_id, ...]} dicts, where
+        appended lists the removed notes whose content was kept).
+        """
+        index = self.duplicate_index()
+        texts_by_id = self.texts_by_id()
+        index.sync(texts_by_id)
+        groups = [[self.notes_by_id[note_id] for note_id in group]
+                  for group in index.groups(texts_by_id, threshold)]
+
+        if not merge or not groups:
+            return groups, []
+
+        position = {id(n): i for i, n in enumerate(self.notes)}
+        merges = []
+        removed = set()
+        for group_notes in groups:
+            keep = self.keeper(group_notes, position)
+            others = sorted((n for n in group_notes if n is not keep), key=lambda n: position[id(n)])
+            tags = []
+            for note in [keep] + others:
+                note_tags = note.get('tags', '')
+                if isinstance(note_tags, str):
+                    note_tags = note_tags.split(',')
+                for tag in note_tags:
+                    tag = tag.strip()
+                    if tag and tag not in tags:
+                        tags.append(tag)
+            keep['tags'] = tags if isinstance(keep.get('tags'), list) else ','.join(tags)
+
+            keep_shingles = word_shingles(get_note_text(keep))
+            appended = [n for n in others
+                        if jaccard(keep_shingles, word_shingles(get_note_text(n))) < threshold]
+            if appended:
+                keep['content'] = '\n\n'.join([keep.get('content', '')] + [
+                    f"{get_note_title(n, '')}\n{n.get('content', '')}".strip() for n in appended])
+                if 'updated_at' in keep:
+                    keep['updated_at'] = datetime.now().isoformat()
+            merges.append({'kept': keep['note_id'], 'removed': [n['note_id'] for n in others],
+                           'appended': [n['note_id'] for n in appended]})
+            removed.update(n['note_id'] for n in others)
+
+        self.notes = [n for n in self.notes if n.get('note_id') not in removed]
+        self._changed(backup=True)
+        for note_id in removed:
+            del self.notes_by_id[note_id]
+            self.removed_version[note_id] = self.version
+            index.remove(note_id)
+        for m in merges:
+            if m['appended']:
+                self._fields_changed(m['kept'], ['tags', 'content', 'updated_at'])
+                index.add(m['kept'], get_note_text(self.notes_by_id[m['kept']]))
+            else:
+                self._fields_changed(m['kept'], ['tags'])
+        return groups, merges
+
+    @staticmethod
+    def keeper(group_notes: list, position: dict) -> dict:
+        """
+        The note a merge keeps: the most recently updated one when every note
+        has an updated_at (the CLI sets it, the TUI does not), otherwise the
+        one added last, i.e. furthest down notes.json.
+        """
+        if all(n.get('updated_at') for n in group_notes):
+            return max(group_notes, key=lambda n: (n['updated_at'], position[id(n)]))
+        return max(group_notes, key=lambda n: position[id(n)])
+
+    def replace(self, notes: list, base_version: int = None):
+        """
+        Replace the collection with `notes` (the TUI's full view of it).
+
+        Stored fields the caller does not send are kept. Changes made after
+        `base_version` (the version the caller loaded) win over the caller's
+        older view: notes added since are kept, notes removed since stay
+        removed and fields changed since (like tags set by a merge) keep their
+        stored value. Every note the caller sends counts as seen from then
+        on, so one it created and later deletes stays deleted.
+        """
+        if base_version is None:
+            known_ids = set(self.notes_by_id)
+            deleted_ids = set()
+            stored_fields = {}
+        else:
+            known_ids = {note_id for note_id in self.notes_by_id
+                         if self.added_version.get(note_id, 0) <= base_version}
+            deleted_ids = {note_id for note_id, version in self.removed_version.items()
+                           if version > base_version}
+            stored_fields = {
+                note_id: [f for f, version in versions.items() if version > base_version]
+                for note_id, versions in self.field_version.items()
+            }
+            for note in notes:
+                note_id = note.get('note_id')
+                self.added_version[note_id] = min(self.added_version.get(note_id, base_version), base_version)
+        merged = merge_notes(self.notes, notes, known_ids, deleted_ids, stored_fields)
+        previous_ids = set(self.notes_by_id)
+        self.notes = merged
+        self.notes_by_id = {n['note_id']: n for n in merged if n.get('note_id')}
+        self._changed(backup=True)
+        for note_id in self.notes_by_id:
+            self.added_version.setdefault(note_id, self.version)
+        for note_id in previous_ids - self.notes_by_id.keys():
+            self.removed_version[note_id] = self.version
+        self.index_stale = True
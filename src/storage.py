@@ -1,9 +1,14 @@
 import json
 import os
 import shutil
+import sqlite3
+import threading
 from pathlib import Path
 from typing import List
 from models import Note
+from daemon import DaemonError, connect, get_socket_path
+from dedupe import DEFAULT_THRESHOLD
+import notestore
 from datetime import datetime
 import platform
 
@@ -24,6 +29,52 @@ class NoteStorage:
         self.backup_dir.mkdir(parents=True, exist_ok=True)
         self.filepath = self.storage_dir / filename
 
+        # Share the notes daemon's already-loaded store when one is running
+        self.daemon = connect(get_socket_path(self.filepath))
+        # Workers call the daemon too; one request at a time on the shared socket
+        self.daemon_lock = threading.Lock()
+        # Daemon version our notes were loaded from; notes added after it are not ours to delete
+        self.base_version = None
+        # note_id -> fields as last loaded or saved; other notes in the file were added elsewhere
+        self.known_notes = {}
+
+    def _daemon_call(self, op: str, **args):
+        """Call the daemon, falling back to the file for good if it has gone away."""
+        with self.daemon_lock:
+            if self.daemon is None:
+                return None
+            try:
+                return self.daemon.call(op, **args)
+            except (OSError, ValueError, DaemonError) as e:
+                print(f"Notes daemon unavailable, using {self.filepath}: {e}")
+                self.daemon.close()
+                self.daemon = None
+                return None
+
+    def duplicate_groups(self, threshold: float = DEFAULT_THRESHOLD) -> List[List[str]] | None:
+        """
+        Note ids of near-duplicate groups among the saved notes, or None if the
+        duplicate index could not be read. Uses the daemon's index when attached.
+        """
+        result = None
+        if self.daemon is not None:
+            result = self._daemon_call('dedupe', threshold=threshold)
+        if result is not None:
+            groups = result['groups']
+        else:
+            store = None
+            try:
+                store = notestore.NoteStore(self.filepath)
+                groups, _ = store.dedupe(threshold)
+                store.save_index()
+            except (OSError, ValueError, sqlite3.Error) as e:
+                print(f"Error finding similar notes: {e}")
+                return None
+            finally:
+                if store is not None:
+                    store.close()
+        return [[note['note_id'] for note in group] for group in groups]
+
     def _create_backup(self):
         """Create timestamped backup before any save operation."""
         if self.filepath.exists():
@@ -37,36 +88,70 @@ class NoteStorage:
                 old_backup.unlink()
 
     def save_notes(self, notes_with_colors: List[tuple]) -> bool:
+        if self.daemon is not None:
+            # The daemon keeps its own backups
+            result = self._daemon_call('replace_notes',
+                                       notes=self._to_data(notes_with_colors),
+                                       base_version=self.base_version)
+            if result is not None:
+                return True
+
         # Always backup before saving
         self._create_backup()
         try:
-            notes_data = []
-            for note, color in notes_with_colors:
-                notes_data.append({
-                    'noteTitle': note.noteTitle,
-                    'content': note.content,
-                    'tags': note.tags,
-                    'priority': note.priority,
-                    'pinned': note.pinned,
-                    'note_id': note.note_id,
-                    'color': color
-                })
-            
-            with open(self.filepath, 'w', encoding='utf-8') as f:
-                json.dump(notes_data, f, indent=2, ensure_ascii=False)
-            
+            notes_data = self._to_data(notes_with_colors)
+
+            # Keep notes the CLI added and changes made elsewhere since we loaded
+            try:
+                stored = notestore.load_notes(self.filepath)
+            except ValueError:
+                stored = []  # unreadable; the backup above still has it
+            stored_ids = {n.get('note_id') for n in stored}
+            deleted_ids = self.known_notes.keys() - stored_ids if stored else set()
+            stored_fields = {}
+            for data in notes_data:
+                seen = self.known_notes.get(data['note_id'])
+                if seen is not None:
+                    stored_fields[data['note_id']] = [f for f, v in data.items() if seen.get(f) == v]
+            notestore.save_notes(self.filepath, notestore.merge_notes(
+                stored, notes_data, self.known_notes.keys(), deleted_ids, stored_fields))
+            self.known_notes.update((data['note_id'], data) for data in notes_data)
+
             return True
         except Exception as e:
             print(f"Error saving notes: {e}")
             return False
+
+    def _to_data(self, notes_with_colors: List[tuple]) -> List[dict]:
+        notes_data = []
+        for note, color in notes_with_colors:
+            notes_data.append({
+                'noteTitle': note.noteTitle,
+                'content': note.content,
+                'tags': note.tags,
+                'priority': note.priority,
+                'pinned': note.pinned,
+                'note_id': note.note_id,
+                'color': color
+            })
+        return notes_data
     
     def load_notes(self) -> List[tuple]:
         try:
-            if not self.filepath.exists():
-                return []
-            
-            with open(self.filepath, 'r', encoding='utf-8') as f:
-                notes_data = json.load(f)
+            result = None
+            if self.daemon is not None:
+                result = self._daemon_call('get_notes')
+
+            if result is not None:
+                notes_data = result['notes']
+                self.base_version = result['version']
+            else:
+                if not self.filepath.exists():
+                    return []
+
+                with open(self.filepath, 'r', encoding='utf-8') as f:
+                    notes_data = json.load(f)
+            self.known_notes = {data['note_id']: data for data in notes_data if data.get('note_id')}
             
             notes_with_colors = []
             for data in notes_data:
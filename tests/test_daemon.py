@@ -0,0 +1,69 @@
+import json
+import socket
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from daemon import DaemonError, LocalNotes, NotesDaemon, connect, get_socket_path
+from dedupe import INDEX_FILENAME
+from notestore import NoteStore
+
+
+def make_note(note_id: str, content: str) -> dict:
+    return {'noteTitle': 'Title', 'content': content, 'note_id': note_id}
+
+
+def test_batch_leaves_no_index_transaction_open(tmp_path):
+    notes = LocalNotes(tmp_path / 'notes.json')
+    notes.call('add', note=make_note('a', 'alpha beta gamma delta epsilon'))
+
+    # Another writer must not find the index locked between batches
+    db = sqlite3.connect(str(tmp_path / INDEX_FILENAME), timeout=0)
+    db.execute("DELETE FROM buckets")
+    db.commit()
+    db.close()
+
+
+def start_daemon(tmp_path):
+    store = NoteStore(tmp_path / 'notes.json', full_index=True)
+    server = NotesDaemon(get_socket_path(store.filepath), store)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_daemon_answers_malformed_batch(tmp_path):
+    server = start_daemon(tmp_path)
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(5)
+            sock.connect(str(get_socket_path(tmp_path / 'notes.json')))
+            reader = sock.makefile('r', encoding='utf-8')
+            for request in (b'{"batch": 5}\n', b'{"batch": [1]}\n', b'[]\n'):
+                sock.sendall(request)
+                results = json.loads(reader.readline())['results']
+                assert results[0]['ok'] is False
+                assert results[0]['error'].startswith('bad request')
+            # The connection is still usable
+            sock.sendall(b'{"batch": [{"op": "ping"}]}\n')
+            assert json.loads(reader.readline())['results'][0]['ok'] is True
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_client_reports_stopped_daemon_as_daemon_error(tmp_path):
+    socket_path = get_socket_path(tmp_path / 'notes.json')
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(str(socket_path))
+        server.listen()
+        client = connect(socket_path)
+        # The daemon goes away after the client connected
+        server.accept()[0].close()
+
+        with pytest.raises(DaemonError):
+            client.call('ping')
@@ -0,0 +1,157 @@
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC = Path(__file__).resolve().parent.parent / 'src'
+sys.path.insert(0, str(SRC))
+
+from dedupe import (DEFAULT_THRESHOLD, MIN_THRESHOLD, NUM_BANDS, NUM_PERM, RECALL_TARGET, DuplicateIndex,
+                    band_keys, band_params, estimate_similarity, jaccard, minhash, pack_signature, shingles,
+                    word_shingles, _SIGNATURE_STRUCT)
+
+VOCAB = [f'word{i}' for i in range(5000)]
+
+
+def words(rng: random.Random, count: int) -> list:
+    return [rng.choice(VOCAB) for _ in range(count)]
+
+
+def test_signature_is_deterministic_across_processes():
+    text = 'Weekly sync: review the roadmap, then assign owners for each open item'
+    keys = band_keys(minhash(shingles(text)))
+    assert band_keys(minhash(shingles(text))) == keys
+
+    # The index is reused between runs, so hashing must not depend on the hash seed
+    script = f"from dedupe import band_keys, minhash, shingles; print(band_keys(minhash(shingles({text!r}))))"
+    for seed in ('1', '2'):
+        out = subprocess.run([sys.executable, '-c', script], cwd=SRC, capture_output=True, text=True, check=True,
+                             env={**os.environ, 'PYTHONHASHSEED': seed})
+        assert out.stdout.strip() == str(keys)
+
+
+def test_signature_estimate_tracks_jaccard():
+    rng = random.Random(0)
+    for _ in range(20):
+        a = words(rng, 300)
+        b = list(a)
+        for _ in range(rng.randrange(10, 60)):
+            b[rng.randrange(len(b))] = rng.choice(VOCAB)
+        text_a, text_b = ' '.join(a), ' '.join(b)
+        estimate = estimate_similarity(_SIGNATURE_STRUCT.unpack(pack_signature(minhash(shingles(text_a)))),
+                                       _SIGNATURE_STRUCT.unpack(pack_signature(minhash(shingles(text_b)))))
+        assert abs(estimate - jaccard(word_shingles(text_a), word_shingles(text_b))) < 0.2
+
+
+def test_band_params_reach_recall_target():
+    for threshold in (MIN_THRESHOLD, 0.1, 0.3, 0.45, DEFAULT_THRESHOLD, 0.8, 0.9, 1.0):
+        bands, rows = band_params(threshold)
+        assert bands * rows <= NUM_PERM
+        assert 1 - (1 - threshold ** rows) ** bands >= RECALL_TARGET
+    with pytest.raises(ValueError):
+        band_params(MIN_THRESHOLD / 2)
+
+
+def test_sync_reindexes_edited_and_removed_notes(tmp_path):
+    rng = random.Random(1)
+    texts = {f'n{i}': ' '.join(words(rng, 40)) for i in range(10)}
+    index = DuplicateIndex(tmp_path / 'index.sqlite3').load()
+    index.sync(texts)
+    index.save()
+    assert index.note_ids() == set(texts)
+    assert 'n0' in index.candidates(texts['n0'])
+
+    old_text = texts['n0']
+    texts['n0'] = ' '.join(words(rng, 40))
+    del texts['n1']
+    index.sync(texts)
+    index.save()
+    index.close()
+
+    # Reopened from disk, the index matches the notes as they are now
+    index = DuplicateIndex(tmp_path / 'index.sqlite3').load()
+    assert index.note_ids() == set(texts)
+    assert 'n0' in index.candidates(texts['n0'])
+    assert 'n0' not in index.candidates(old_text)
+    assert index.db.execute("SELECT COUNT(*) FROM buckets WHERE note_id = 'n1'").fetchone()[0] == 0
+    bucket_rows = index.db.execute("SELECT COUNT(*) FROM buckets").fetchone()[0]
+    assert bucket_rows == NUM_BANDS * len(texts)
+
+
+def test_find_similar_on_add():
+    rng = random.Random(2)
+    texts = {f'n{i}': ' '.join(words(rng, 30)) for i in range(50)}
+    index = DuplicateIndex().load()
+    index.sync(texts)
+
+    near_copy = texts['n7'] + ' plus one more line'
+    matches = index.find_similar(near_copy, texts)
+    assert [note_id for note_id, _ in matches] == ['n7']
+    assert matches[0][1] >= DEFAULT_THRESHOLD
+    assert index.find_similar(' '.join(words(rng, 30)), texts) == []
+
+
+def test_groups_at_threshold():
+    # 18 words each, 14 in common: 12 of 20 distinct shingles are shared, Jaccard 0.6
+    a = ' '.join(VOCAB[0:18])
+    b = ' '.join(VOCAB[4:22])
+    assert jaccard(word_shingles(a), word_shingles(b)) == pytest.approx(0.6)
+    texts = {'a': a, 'b': b, 'other': ' '.join(VOCAB[100:118])}
+    index = DuplicateIndex().load()
+    index.sync(texts)
+
+    assert [sorted(group) for group in index.groups(texts, 0.6)] == [['a', 'b']]
+    assert index.groups(texts, 0.61) == []
+
+
+@pytest.mark.parametrize('threshold', [0.3, DEFAULT_THRESHOLD, 0.8])
+def test_groups_find_most_pairs_just_above_threshold(threshold):
+    rng = random.Random(3)
+    texts = {}
+    for i in range(100):
+        a = words(rng, rng.choice((12, 80)))
+        b = list(a)
+        while True:
+            changed = list(b)
+            changed[rng.randrange(len(changed))] = rng.choice(VOCAB)
+            if jaccard(word_shingles(' '.join(a)), word_shingles(' '.join(changed))) < threshold:
+                break
+            b = changed
+        texts[f'a{i}'], texts[f'b{i}'] = ' '.join(a), ' '.join(b)
+    index = DuplicateIndex().load()
+    index.sync(texts)
+
+    found = {frozenset(group) for group in index.groups(texts, threshold)}
+    recall = sum(frozenset((f'a{i}', f'b{i}')) in found for i in range(100)) / 100
+    assert recall >= 0.9
+
+
+def test_locked_index_is_not_discarded(tmp_path, monkeypatch):
+    path = tmp_path / 'index.sqlite3'
+    index = DuplicateIndex(path).load()
+    index.add('a', 'some note worth keeping around')
+    index.save()
+    index.close()
+
+    db = sqlite3.connect(str(path))
+    db.execute("BEGIN EXCLUSIVE")
+    connect = sqlite3.connect
+    monkeypatch.setattr(sqlite3, 'connect', lambda *args, **kwargs: connect(*args, **kwargs, timeout=0))
+    with pytest.raises(sqlite3.OperationalError):
+        DuplicateIndex(path).load()
+    db.rollback()
+    db.close()
+
+    assert 'a' in DuplicateIndex(path).load()
+
+
+def test_corrupt_index_is_rebuilt(tmp_path):
+    path = tmp_path / 'index.sqlite3'
+    path.write_bytes(b'not a database' * 100)
+    index = DuplicateIndex(path).load()
+    index.add('a', 'some note')
+    assert index.note_ids() == {'a'}
@@ -0,0 +1,67 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from navigation import GridNavigator
+
+
+def make_grid(columns: int, count: int, index: int = 0) -> GridNavigator:
+    grid = GridNavigator(columns)
+    grid.sync(index, count)
+    return grid
+
+
+def test_position_and_row_count():
+    grid = make_grid(3, 10, 7)
+    assert (grid.row, grid.col) == (2, 1)
+    assert grid.row_count == 4
+    assert make_grid(3, 0).row_count == 0
+
+
+def test_resize_keeps_the_note():
+    grid = make_grid(3, 10, 7)
+    grid.resize(4)
+    assert grid.index == 7
+    assert (grid.row, grid.col) == (1, 3)
+    grid.resize(0)
+    assert grid.columns == 1
+
+
+def test_sync_and_index_at_clamp_to_the_notes():
+    grid = make_grid(3, 10, 25)
+    assert grid.index == 9
+    assert grid.index_at(5, 2) == 9
+    assert grid.index_at(-1, 0) == 0
+    grid.sync(4, 0)
+    assert grid.index == 0
+
+
+def test_up_and_down_keep_the_column():
+    grid = make_grid(3, 10, 4)
+    assert grid.down() == 7
+    assert grid.up() == 1
+    assert make_grid(3, 10, 1).up() == 1
+    # The last row is short: moving into it lands on its last note
+    assert make_grid(3, 10, 8).down() == 9
+    assert make_grid(3, 10, 9).down() == 9
+
+
+def test_page_moves_stop_at_the_ends():
+    grid = make_grid(3, 30, 4)
+    assert grid.page_down(3) == 13
+    assert grid.page_down(100) == 28
+    assert grid.page_up(3) == 1
+    assert grid.page_up(0) == 1
+    assert make_grid(3, 30, 28).page_down(0) == 28
+
+
+def test_home_end_and_jump():
+    grid = make_grid(3, 10, 5)
+    assert grid.home() == 0
+    assert grid.end() == 9
+    assert grid.jump(1) == 0
+    assert grid.jump(10) == 9
+    assert grid.jump(0) is None
+    assert grid.jump(11) is None
+    assert make_grid(3, 0).end() == 0
@@ -0,0 +1,104 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from notestore import NoteStore, merge_notes
+
+
+def make_note(note_id: str, title: str = 'Title') -> dict:
+    return {'noteTitle': title, 'content': f'content of {note_id}', 'note_id': note_id}
+
+
+def test_replace_keeps_deletion_of_note_created_by_caller(tmp_path):
+    store = NoteStore(tmp_path / 'notes.json')
+    store.add(make_note('a'), check_duplicates=False)
+    store.flush()
+    base_version = store.version
+
+    # The TUI adds a note and saves, then deletes it and saves again
+    store.replace([make_note('a'), make_note('x')], base_version)
+    store.flush()
+    store.replace([make_note('a')], base_version)
+    store.flush()
+
+    assert [n['note_id'] for n in store.notes] == ['a']
+    assert [n['note_id'] for n in NoteStore(tmp_path / 'notes.json').notes] == ['a']
+
+
+def test_replace_keeps_notes_added_after_base_version(tmp_path):
+    store = NoteStore(tmp_path / 'notes.json')
+    store.add(make_note('a'), check_duplicates=False)
+    base_version = store.version
+
+    # The CLI adds a note the TUI has not loaded
+    store.add(make_note('cli'), check_duplicates=False)
+    store.replace([make_note('a', 'Edited')], base_version)
+
+    assert [n['note_id'] for n in store.notes] == ['a', 'cli']
+    assert store.notes_by_id['a']['noteTitle'] == 'Edited'
+
+
+def test_merge_notes_keeps_stored_fields_and_unknown_notes():
+    stored = [
+        {**make_note('a'), 'created_at': '2026-01-01T00:00:00'},
+        make_note('deleted'),
+        make_note('cli'),
+    ]
+    merged = merge_notes(stored, [make_note('a', 'Edited')], known_ids={'a', 'deleted'})
+
+    assert [n['note_id'] for n in merged] == ['a', 'cli']
+    assert merged[0]['noteTitle'] == 'Edited'
+    assert merged[0]['created_at'] == '2026-01-01T00:00:00'
+
+
+def test_replace_after_merge_keeps_merge(tmp_path):
+    store = NoteStore(tmp_path / 'notes.json')
+    text = 'plan the quarterly roadmap review with the whole team on friday'
+    store.add({**make_note('A'), 'content': text, 'tags': 'a'}, check_duplicates=False)
+    store.add({**make_note('B'), 'content': text, 'tags': 'b'}, check_duplicates=False)
+    store.add(make_note('N'), check_duplicates=False)
+    base_version = store.version
+    stale = [dict(n) for n in store.notes]
+
+    _, merges = store.dedupe(merge=True)
+    assert merges == [{'kept': 'B', 'removed': ['A'], 'appended': []}]
+
+    # The TUI saves the view it loaded before the merge
+    store.replace(stale, base_version)
+
+    assert [n['note_id'] for n in store.notes] == ['B', 'N']
+    assert store.notes_by_id['B']['tags'] == 'b,a'
+
+
+def test_merge_appends_notes_not_similar_to_keeper(tmp_path):
+    store = NoteStore(tmp_path / 'notes.json')
+    words = [f'word{i}' for i in range(28)]
+    # A ~ B and B ~ C, but A and C share too little to be duplicates
+    for note_id, start in (('A', 0), ('B', 4), ('C', 8)):
+        store.add({'noteTitle': '', 'content': ' '.join(words[start:start + 20]), 'note_id': note_id},
+                  check_duplicates=False)
+
+    groups, merges = store.dedupe(merge=True)
+
+    assert [sorted(n['note_id'] for n in group) for group in groups] == [['A', 'B', 'C']]
+    assert merges == [{'kept': 'C', 'removed': ['A', 'B'], 'appended': ['A']}]
+    content = store.notes_by_id['C']['content']
+    assert content.startswith(' '.join(words[8:28]))
+    assert content.endswith(' '.join(words[0:20]))
+
+
+def test_keeper_prefers_newest_then_last_added():
+    old = {**make_note('old'), 'updated_at': '2026-01-02T00:00:00'}
+    new = {**make_note('new'), 'updated_at': '2026-03-01T00:00:00'}
+    tie = {**make_note('tie'), 'updated_at': '2026-03-01T00:00:00'}
+    untimed = make_note('untimed')
+
+    def keeper(*group):
+        return NoteStore.keeper(list(group), {id(n): i for i, n in enumerate(group)})['note_id']
+
+    assert keeper(new, old) == 'new'
+    # Equal timestamps: the one further down notes.json
+    assert keeper(tie, new, old) == 'new'
+    # Without updated_at on every note, file position decides
+    assert keeper(new, untimed, old) == 'old'
@@ -0,0 +1,34 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from models import Note
+from storage import NoteStorage
+
+
+def test_file_save_keeps_changes_made_elsewhere(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_DATA_HOME', str(tmp_path))
+    storage = NoteStorage()
+    storage.filepath.write_text(json.dumps([
+        {'noteTitle': 'A', 'content': 'a', 'tags': 'a', 'note_id': 'A', 'created_at': '2026-01-01'},
+        {'noteTitle': 'B', 'content': 'b', 'tags': 'b', 'note_id': 'B'},
+    ]), encoding='utf-8')
+    notes_with_colors = storage.load_notes()
+
+    # Meanwhile the CLI merges B into A and adds C
+    stored = json.loads(storage.filepath.read_text(encoding='utf-8'))
+    stored[0]['tags'] = 'a,b'
+    stored[1] = {'noteTitle': 'C', 'content': 'c', 'tags': '', 'note_id': 'C'}
+    storage.filepath.write_text(json.dumps(stored), encoding='utf-8')
+
+    note_a, color = notes_with_colors[0]
+    notes_with_colors[0] = (Note('A edited', content=note_a.content, tags=note_a.tags, note_id='A'), color)
+    assert storage.save_notes(notes_with_colors)
+
+    saved = json.loads(storage.filepath.read_text(encoding='utf-8'))
+    assert [n['note_id'] for n in saved] == ['A', 'C']
+    assert saved[0]['noteTitle'] == 'A edited'
+    assert saved[0]['tags'] == 'a,b'
+    assert saved[0]['created_at'] == '2026-01-01'